@@ -0,0 +1,91 @@
+import os
+
+from tex2img import TeX2img
+
+TEX = TeX2img().prepare(r"$\alpha$")
+
+
+def store(converter, tmp_path, tex, size):
+    output_file = tmp_path / "output.svg"
+    output_file.write_bytes(b"x" * size)
+    cached_file = converter._TeX2img__cached_file(tex, str(output_file), False)
+    converter._TeX2img__store(str(output_file), cached_file)
+    return cached_file
+
+
+def write_old(path, size, atime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (atime, atime))
+    return path
+
+
+def test_render_copies_the_cached_file(tmp_path):
+    converter = TeX2img(cache_dir=tmp_path / "cache")
+    output_file = tmp_path / "output.svg"
+    cached_file = converter._TeX2img__cached_file(TEX, str(output_file), False)
+    write_old(tmp_path / cached_file, 3, 1000)
+
+    # The file is copied without running any command
+    converter.render(TEX, str(output_file))
+
+    assert output_file.read_bytes() == b"xxx"
+    assert os.stat(cached_file).st_atime > 1000
+
+
+def test_cached_file_depends_on_the_inputs(tmp_path):
+    converter = TeX2img(cache_dir=tmp_path)
+    cached_file = converter._TeX2img__cached_file(TEX, "a.svg", False)
+
+    assert cached_file.startswith(str(tmp_path / "renders"))
+    assert cached_file == converter._TeX2img__cached_file(TEX, "b.SVG", False)
+    assert cached_file != converter._TeX2img__cached_file(TEX, "a.png", False)
+    assert cached_file != converter._TeX2img__cached_file(TEX, "a.svg", True)
+    assert cached_file != converter._TeX2img__cached_file(TEX + " ", "a.svg", False)
+    converter.commands["svg"].args += " --zoom=2"
+    assert cached_file != converter._TeX2img__cached_file(TEX, "a.svg", False)
+
+
+def test_store_evicts_the_least_recently_used_files(tmp_path):
+    converter = TeX2img(cache_dir=tmp_path, cache_size=250)
+    renders = tmp_path / "renders"
+    oldest = write_old(renders / "aa" / "aa1.svg", 100, 1000)
+    # Files stored before the subdirectories existed
+    top_level = write_old(renders / "bb2.svg", 100, 2000)
+    recent = write_old(renders / "cc" / "cc3.svg", 100, 3000)
+    partial = write_old(renders / "cc" / "cc4.123_456.tmp", 100, 500)
+
+    cached_file = store(converter, tmp_path, TEX, 100)
+
+    assert os.path.exists(cached_file)
+    assert recent.exists()
+    assert not oldest.exists()
+    assert not top_level.exists()
+    # Partial files of other renders are left alone
+    assert partial.exists()
+
+
+def test_store_keeps_files_under_the_cache_size(tmp_path):
+    converter = TeX2img(cache_dir=tmp_path, cache_size=1000)
+    old = write_old(tmp_path / "renders" / "aa" / "aa1.svg", 100, 1000)
+
+    cached_file = store(converter, tmp_path, TEX, 100)
+
+    assert os.path.exists(cached_file)
+    assert old.exists()
+    assert not [
+        name
+        for name in os.listdir(os.path.dirname(cached_file))
+        if name.endswith(".tmp")
+    ]
+
+
+def test_clear_cache_keeps_other_files(tmp_path):
+    for name in ["fmt/tex2img_key.fmt", "renders/ab/abcd.svg", "other/file.txt"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("file")
+    (tmp_path / "file.txt").write_text("file")
+
+    TeX2img(cache_dir=tmp_path).clear_cache()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["file.txt", "other"]
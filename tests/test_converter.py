@@ -0,0 +1,66 @@
+import logging
+import pickle
+
+import pytest
+
+from tex2img import TeX2img
+from tex2img.tex2img import _logger, _verbose
+
+
+@pytest.fixture
+def quiet_logger():
+    level = _logger.level
+    _logger.setLevel(logging.WARNING)
+    yield _logger
+    _logger.setLevel(level)
+
+
+def test_verbose_restores_the_level(quiet_logger):
+    with _verbose(True):
+        assert quiet_logger.level == logging.INFO
+    assert quiet_logger.level == logging.WARNING
+
+
+def test_verbose_restores_the_level_after_the_last_render(quiet_logger):
+    first, second = _verbose(True), _verbose(True)
+    first.__enter__()
+    second.__enter__()
+    first.__exit__(None, None, None)
+    assert quiet_logger.level == logging.INFO
+    second.__exit__(None, None, None)
+    assert quiet_logger.level == logging.WARNING
+
+
+def test_verbose_restores_the_level_on_errors(quiet_logger):
+    with pytest.raises(RuntimeError):
+        with _verbose(True):
+            raise RuntimeError
+    assert quiet_logger.level == logging.WARNING
+
+
+def test_not_verbose_keeps_the_level(quiet_logger):
+    with _verbose(False):
+        assert quiet_logger.level == logging.WARNING
+
+
+def test_pickle_round_trip(tmp_path):
+    converter = TeX2img(
+        fontsize=10,
+        params={"color": "red"},
+        flow="dvips",
+        use_cache=False,
+        cache_dir=tmp_path,
+    )
+    converter.commands["svg"].args += " --zoom=2"
+    tex = converter.prepare("x")
+
+    copy = pickle.loads(pickle.dumps(converter))
+
+    assert copy.prepare("x") == tex
+    assert copy.commands["svg"].args == converter.commands["svg"].args
+    assert (copy.flow, copy.use_cache, copy.cache_dir) == ("dvips", False, tmp_path)
+    assert not copy.daemon
+    # Each copy has its own locks and job counter
+    assert copy._TeX2img__formats_lock is not converter._TeX2img__formats_lock
+    assert copy._TeX2img__daemon_lock is not converter._TeX2img__daemon_lock
+    assert next(copy._TeX2img__jobs) == 0
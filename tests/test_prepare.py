@@ -0,0 +1,63 @@
+from string import Template
+
+import pytest
+
+from tex2img import TeX2img, DEFAULT_TEMPLATE
+
+
+def expected(converter, body, template=None, **kwargs):
+    params = {
+        "preamble": converter.preamble,
+        "fontsize": converter.fontsize,
+        "body": body,
+    }
+    params.update(converter.params)
+    params.update(kwargs)
+    return Template(template or converter.template).safe_substitute(params)
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        DEFAULT_TEMPLATE,
+        r"\documentclass{article} costs $$5 ${body}\end{document}",
+        r"$1 ${ body} $ ${unknown} $unknown ${body}",
+        r"${body} and again $body",
+        r"no body at all ${preamble}",
+    ],
+)
+def test_prepare_matches_safe_substitute(template):
+    converter = TeX2img(template=template, params={"color": "red"})
+
+    assert converter.prepare(r"$\alpha$") == expected(converter, r"$\alpha$")
+    # The second call reuses the text around the body
+    assert converter.prepare(r"$\beta$") == expected(converter, r"$\beta$")
+
+
+def test_prepare_with_arguments():
+    converter = TeX2img(template=r"${fontsize} ${color} ${body}")
+
+    assert converter.prepare("x", fontsize=10, color="blue") == "10 blue x"
+    assert converter.prepare("x", template="$$${body}") == "$x"
+
+
+def test_prepare_with_body_in_params():
+    converter = TeX2img(params={"body": "fixed"})
+
+    assert converter.prepare("x") == expected(converter, "x")
+    assert "fixed" in converter.prepare("x")
+
+
+def test_prepare_after_changing_params():
+    converter = TeX2img(template=r"${color} ${body} ${preamble}")
+    converter.params["color"] = "red"
+    assert converter.prepare("x") == expected(converter, "x")
+
+    converter.params["color"] = "blue"
+    assert converter.prepare("x") == expected(converter, "x")
+
+    converter.preamble = r"\usepackage{tikz}"
+    assert converter.prepare("x") == expected(converter, "x")
+
+    converter.template = r"${body}!"
+    assert converter.prepare("x") == "x!"
@@ -0,0 +1,65 @@
+import sys
+from shutil import which
+
+import pytest
+
+from tex2img import TeX2img, CMD
+
+# Writes the pages in the range of argv[2] like dvisvgm (%p) or mutool (%d)
+FAKE_PAGES = r"""
+import sys
+pattern, pages, width = sys.argv[1], sys.argv[2], int(sys.argv[3])
+first, last = map(int, pages.split("-"))
+for page in range(first, last + 1):
+    with open(pattern.replace(sys.argv[4], str(page).zfill(width)), "w") as f:
+        f.write(str(page))
+"""
+
+
+@pytest.mark.skipif(
+    which("pdflatex") is None or which("gs") is None,
+    reason="pdflatex and gs are required",
+)
+def test_render_batch_writes_one_page_per_body(tmp_path):
+    converter = TeX2img(flow="pdflatex", use_cache=False, cache_dir=tmp_path / "cache")
+    output_files = [str(tmp_path / "alpha.pdf"), str(tmp_path / "beta.pdf")]
+
+    converter.render_batch([r"$\alpha$", r"$\beta$"], output_files)
+
+    pages = [open(output_file, "rb").read() for output_file in output_files]
+    assert all(page.startswith(b"%PDF") for page in pages)
+    assert pages[0] != pages[1]
+
+
+@pytest.mark.parametrize(
+    "cmd_name, suffix, width",
+    [("svg", ".svg", 1), ("svg", ".svg", 2), ("mutool", ".png", 1)],
+)
+def test_convert_pages_moves_each_page(tmp_path, cmd_name, suffix, width):
+    script = tmp_path / "fake_pages.py"
+    script.write_text(FAKE_PAGES)
+    pattern = {"svg": "%p", "mutool": "%d"}[cmd_name]
+    converter = TeX2img(use_cache=False, cache_dir=tmp_path / "cache")
+    converter.commands[cmd_name] = CMD(
+        sys.executable, f"{script} {{out_file}} {{page}} {width} {pattern}"
+    )
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    output_files = [str(tmp_path / f"out{page}{suffix}") for page in range(1, 11)]
+
+    converter._TeX2img__convert_pages(cmd_name, suffix, output_files, {}, str(workdir))
+
+    for page, output_file in enumerate(output_files, 1):
+        assert open(output_file).read() == str(page)
+
+
+def test_convert_pages_reports_missing_pages(tmp_path):
+    converter = TeX2img(use_cache=False, cache_dir=tmp_path / "cache")
+    converter.commands["svg"] = CMD(sys.executable, "-c pass")
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+
+    with pytest.raises(RuntimeError, match="did not write the 2 pages"):
+        converter._TeX2img__convert_pages(
+            "svg", ".svg", ["a.svg", "b.svg"], {}, str(workdir)
+        )
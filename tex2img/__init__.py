@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from .tex2img import DEFAULT_PREAMBLE, DEFAULT_TEMPLATE, DEFAULT_FONTSIZE
-from .tex2img import VALID_SUFFIXES
+from .tex2img import VALID_SUFFIXES, VALID_FLOWS, VALID_BACKENDS
 from .tex2img import TeX2img, CMD
 
 __all__ = [
@@ -10,5 +10,7 @@ __all__ = [
     "DEFAULT_TEMPLATE",
     "DEFAULT_FONTSIZE",
     "VALID_SUFFIXES",
+    "VALID_FLOWS",
+    "VALID_BACKENDS",
     "TeX2img",
 ]
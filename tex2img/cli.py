@@ -1,13 +1,10 @@
 import sys
 import argparse
-from inspect import cleandoc
 from pathlib import Path
 
-from tex2img import TeX2img, DEFAULT_FONTSIZE
+from tex2img import TeX2img, DEFAULT_FONTSIZE, VALID_FLOWS, VALID_BACKENDS
 
-_DESC = cleandoc(
-    r"""
-Render TeX code from a file or stdin as a document.
+_DESC = r"""Render TeX code from a file or stdin as a document.
 
 The different available flows are the following:
 
@@ -21,10 +18,23 @@ The different available flows are the following:
         latex     dvips    ps2pdf
 [4] TeX ----> DVI ----> SVG --?--> SVG
         latex     dvips     scour
-[5] TeX ----> DVI -> JPG/PNG/TIFF
-        latex     gs
-"""
-)
+[5] TeX ----> DVI ----> PS -----> JPG/PNG/TIFF
+        latex     dvips     gs
+[6] TeX ----> PDF -----> JPG/PNG/TIFF
+      pdflatex     gs
+[7] TeX ----> PDF
+      pdflatex
+[8] TeX ----> PDF -----> EPS
+      pdflatex   pdftops
+[9] TeX ----> DVI ----> PNG
+        latex    dvipng
+[10] TeX ----> DVI ----> PDF
+         latex    dvipdfmx
+
+Flows [6], [7] and [8] are used instead of [5], [3] and [2] unless --flow=dvips is given.
+With --flow=dvips, PNG files are produced with [9] when dvipng is available,
+and PDF files with [10] when dvipdfmx is available.
+In [6], PNG files are produced with mutool instead of gs when it is available."""
 
 
 class ParseKwargs(argparse.Action):
@@ -61,6 +71,35 @@ def main():
         action="store_true",
         default=False,
     )
+    parser.add_argument(
+        "--no-precompile",
+        help="do not precompile the preamble into a format file",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="do not reuse nor store rendered files in the cache",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="directory for the precompiled preambles and rendered files",
+        type=Path,
+    )
+    parser.add_argument(
+        "--flow",
+        help="flow used for the PDF, EPS and raster outputs. Defaults to pdflatex",
+        choices=VALID_FLOWS,
+        default="pdflatex",
+    )
+    parser.add_argument(
+        "--backend",
+        help="rasterizer for the PDF of pdflatex. pypdfium2 requires pypdfium2 and Pillow. Defaults to gs",
+        choices=VALID_BACKENDS,
+        default="gs",
+    )
     parser.add_argument(
         "--template-file",
         help="filepath for the document template",
@@ -80,7 +119,7 @@ def main():
     parser.add_argument(
         "-i",
         "--input-file",
-        type=argparse.FileType("r", encoding="UTF-8"),
+        type=argparse.FileType("rb"),
         help="path to the input TeX file.",
     )
     parser.add_argument(
@@ -106,6 +145,17 @@ def main():
 
     args = vars(parser.parse_args())
 
+    if args.get("input_file", False):
+        # Read in one go and decoded once, without the newline translation of text mode
+        body = args["input_file"].read().strip().decode("utf-8")
+    else:
+        body = args["body"]
+
+    # Nothing is set up when there is nothing to render
+    if not body and not args["check_deps"]:
+        parser.print_usage()
+        sys.exit(0)
+
     template = None
     if args["template_file"] and Path(args["template_file"]).exists():
         with open(args["template_file"], "r") as fp:
@@ -115,12 +165,22 @@ def main():
         with open(args["preamble_file"], "r") as fp:
             preamble = fp.read()
 
-    converter = TeX2img(template, preamble, args["fontsize"], args["params"])
+    converter = TeX2img(
+        template,
+        preamble,
+        args["fontsize"],
+        args["params"],
+        precompile=not args["no_precompile"],
+        flow=args["flow"],
+        use_cache=not args["no_cache"],
+        cache_dir=args["cache_dir"],
+        backend=args["backend"],
+    )
 
     if args.get("arguments", False):
         for name, cmd_args in args["arguments"].items():
             if not converter.commands.get(name, False):
-                converter.logger.info(f"Command {name} not found. Ignoring")
+                converter.logger.info("Command %s not found. Ignoring", name)
             else:
                 converter.commands[name].args = cmd_args
 
@@ -134,15 +194,6 @@ def main():
         print(converter.template)
         sys.exit(0)
 
-    if args.get("input_file", False):
-        body = args["input_file"].read().strip()
-    else:
-        body = args["body"]
-
-    if not body:
-        parser.print_usage()
-        sys.exit(0)
-
     try:
         converter.render(
             converter.prepare(body),
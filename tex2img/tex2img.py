@@ -4,68 +4,298 @@ import subprocess
 import shlex
 import sys
 import logging
-import random
-import string
+import hashlib
+import shutil
+import itertools
+import functools
+import threading
+import contextlib
+import pickle
+import re
+from importlib.util import find_spec
 from pathlib import Path
 from shutil import which
 import os
 from string import Template
-from tempfile import TemporaryDirectory
-from ctypes.util import find_library
-from inspect import cleandoc
-from typing import Optional, Dict, List
-
-DEFAULT_TEMPLATE = cleandoc(
-    r"""
-    \documentclass[${fontsize}pt,preview,varwidth]{standalone}
-    ${preamble}
-    \begin{document}
-    ${body}
-    \end{document}
-    """
-)
+from tempfile import TemporaryDirectory, TemporaryFile
+from typing import Optional, Dict, List, Tuple, Union, TYPE_CHECKING
 
-DEFAULT_PREAMBLE = cleandoc(
-    r"""
-    \usepackage[utf8]{inputenc}
-    \usepackage{float}
-    \usepackage{graphicx}
-    \usepackage{textcomp}
-    \usepackage{siunitx}
-    \usepackage{xcolor}
-    \usepackage{comment}
-    \usepackage[boxed,algoruled,vlined,linesnumbered]{algorithm2e}
-    \usepackage{amsmath,amsthm,amssymb,amsfonts,amstext,newtxtext}
-    \usepackage{color,soul}
-    \usepackage{tikz}
-    \usepackage{booktabs}
-    \usepackage{enumitem}
-    """
-)
+# asyncio, concurrent.futures and ctypes are only imported when used,
+# as they take longer to import than the rest of the module
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+DEFAULT_TEMPLATE = r"""\documentclass[${fontsize}pt,preview,varwidth]{standalone}
+${preamble}
+\begin{document}
+${body}
+\end{document}"""
+
+DEFAULT_PREAMBLE = r"""\usepackage[utf8]{inputenc}
+\usepackage{float}
+\usepackage{graphicx}
+\usepackage{textcomp}
+\usepackage{siunitx}
+\usepackage{xcolor}
+\usepackage{comment}
+\usepackage[boxed,algoruled,vlined,linesnumbered]{algorithm2e}
+\usepackage{amsmath,amsthm,amssymb,amsfonts,amstext,newtxtext}
+\usepackage{color,soul}
+\usepackage{tikz}
+\usepackage{booktabs}
+\usepackage{enumitem}"""
 
 DEFAULT_FONTSIZE = 12
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("TEX2IMG_CACHE")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "tex2img"
+).expanduser()
+DEFAULT_CACHE_SIZE = 100 * 1024 * 1024
 VALID_SUFFIXES = [".ps", ".eps", ".pdf", ".svg", ".jpg", ".png", ".tiff"]
+_VALID_SUFFIXES = frozenset(VALID_SUFFIXES)
+# Props of the temporary files of a render and their suffixes
+_FILE_PROPS = tuple(
+    (f"{suffix[1:]}_file", suffix) for suffix in [".tex", ".dvi", *VALID_SUFFIXES]
+)
+VALID_FLOWS = ["dvips", "pdflatex"]
+VALID_BACKENDS = ["gs", "pypdfium2"]
+
+
+# Logger that writes to stdout, shared by all the converters
+_logger = logging.getLogger("tex2img")
+if not _logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setLevel(logging.INFO)
+    _handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s :: %(levelname)s :: %(message)s", datefmt="%H:%M:%S"
+        )
+    )
+    _logger.addHandler(_handler)
+    _logger.setLevel(logging.ERROR)
+    _logger.propagate = False
+
+
+# Number of verbose renders running and the level of the logger before the first one
+_verbose_lock = threading.Lock()
+_verbose_renders = 0
+_quiet_level = logging.ERROR
+
+
+@contextlib.contextmanager
+def _verbose(enabled: bool):
+    """Logs the executed commands while a verbose render runs
+
+    The level of the logger is restored once the last verbose render finishes,
+    so the other renders keep their level.
+
+    Args:
+        enabled: If False, the level of the logger is not changed
+    """
+    global _verbose_renders, _quiet_level
+    if not enabled:
+        yield
+        return
+
+    with _verbose_lock:
+        if _verbose_renders == 0:
+            _quiet_level = _logger.level
+            _logger.setLevel(logging.INFO)
+        _verbose_renders += 1
+    try:
+        yield
+    finally:
+        with _verbose_lock:
+            _verbose_renders -= 1
+            if _verbose_renders == 0:
+                _logger.setLevel(_quiet_level)
+
+
+@functools.lru_cache(maxsize=32)
+def _split_template(template: str) -> Tuple[Union[str, Tuple[str, str]], ...]:
+    """Splits a template around its placeholders
+
+    The result is cached, so each template is only parsed once.
+
+    Args:
+        template: A template in the format of `string.Template`
+
+    Returns:
+        A tuple with the literal text as strings and the placeholders as tuples
+        containing the name of the variable and the placeholder as written.
+    """
+    parts: List[Union[str, Tuple[str, str]]] = []
+    last = 0
+    for match in Template.pattern.finditer(template):
+        parts.append(template[last : match.start()])
+        name = match.group("named") or match.group("braced")
+        if name is not None:
+            parts.append((name, match.group()))
+        elif match.group("escaped") is not None:
+            parts.append(Template.delimiter)
+        else:
+            # Invalid placeholders are kept as is, like `Template.safe_substitute`
+            parts.append(match.group())
+        last = match.end()
+    parts.append(template[last:])
+    return tuple(parts)
+
+
+def _write_tex(path: Path, tex: str, header: str = ""):
+    """Writes a TeX document encoded as UTF-8
+
+    The file is written with a single unbuffered system call when possible.
+
+    Args:
+        path: The path to the file.
+        tex: The TeX document.
+        header: Text written before the document.
+    """
+    data = memoryview((header + tex).encode("utf-8"))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        while data:
+            data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
+
+
+@functools.lru_cache(maxsize=1)
+def _find_libgs() -> Tuple[bool, Optional[str]]:
+    """Looks for the Ghostscript library once per process
+
+    `find_library` may run ldconfig or a compiler, so it is too slow to call for each converter.
+
+    Returns:
+        True if libgs was found and the path to set in LIBGS, if the linker cannot find it on its own
+    """
+    from ctypes.util import find_library
+
+    if find_library("gs"):
+        return True, None
+    if sys.platform == "darwin":
+        # Fallback to homebrew Ghostscript on macOS
+        homebrew_libgs = "/usr/local/opt/ghostscript/lib/libgs.dylib"
+        if Path(homebrew_libgs).exists():
+            return True, homebrew_libgs
+    return False, None
+
+
+@functools.lru_cache(maxsize=1)
+def _has_mylatexformat() -> bool:
+    """Looks for mylatexformat once per process
+
+    Without it, building a format only fails after pdftex has read the whole preamble,
+    which would be paid again by every converter.
+
+    Returns:
+        True if mylatexformat is installed, or if kpsewhich is not found to tell
+    """
+    kpsewhich = which("kpsewhich")
+    if kpsewhich is None:
+        return True
+    ret = subprocess.run(
+        [kpsewhich, "mylatexformat.ltx"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if ret.returncode != 0:
+        _logger.info("mylatexformat not found. The preamble is not precompiled")
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _has_module(name: str) -> bool:
+    """Checks once per process if a Python module can be imported
+
+    Like the binaries of `CMD`, the optional modules are not searched in sys.path on each render.
+
+    Args:
+        name: The name of the module
+
+    Returns:
+        True if the module is installed
+    """
+    return find_spec(name) is not None
+
+
+def _remove_job_files(directory: str, stem: str):
+    """Removes the files of a job, named `stem` with any extension
+
+    Args:
+        directory: The directory of the files, which may have been removed already
+        stem: The name of the files without extension
+    """
+    with contextlib.suppress(FileNotFoundError):
+        for entry in os.scandir(directory):
+            if entry.name.startswith(f"{stem}."):
+                os.unlink(entry.path)
+
+
+def _best_tmp() -> Optional[str]:
+    """Returns the directory where the temporary files are written
+
+    The intermediate files are only read by the next command, so on Linux they are
+    kept in memory (/dev/shm or $XDG_RUNTIME_DIR) when possible. The directory can
+    be forced with the TEX2IMG_TMPDIR environment variable.
+
+    Returns:
+        The directory or None to use the default temporary directory
+    """
+    if os.environ.get("TEX2IMG_TMPDIR"):
+        return os.environ["TEX2IMG_TMPDIR"]
+    if sys.platform == "linux":
+        for tmp in ("/dev/shm", os.environ.get("XDG_RUNTIME_DIR")):
+            if tmp and os.path.isdir(tmp) and os.access(tmp, os.W_OK | os.X_OK):
+                return tmp
+    return None
 
 
 class CMD:
     """Wrapper around a shell command
 
+    The binaries are looked up in PATH only once per process and shared by all the instances.
+    The arguments are split when they are set, so each call only formats the arguments.
+
     Attributes:
         cmd: Command to execute.
         args: Arguments for the command.
     """
 
+    _RESOLVED_PATHS: Dict[str, Optional[str]] = {}
+
     def __init__(self, cmd: str, args: str):
         self.cmd: str = cmd
         self.args: str = args
 
+    @property
+    def args(self) -> str:
+        return self.__args
+
+    @args.setter
+    def args(self, args: str):
+        self.__args = args
+        self.__argv = shlex.split(args)
+
+    @classmethod
+    def _resolve_path(cls, cmd: str) -> Optional[str]:
+        "Returns the path of the binary, looking it up in PATH the first time"
+        if cmd not in cls._RESOLVED_PATHS:
+            cls._RESOLVED_PATHS[cmd] = which(cmd)
+        return cls._RESOLVED_PATHS[cmd]
+
     def path(self) -> str:
         "Returns the path of the command or 'Not found' if the binary is not found in the system"
-        return which(self.cmd) or "Not found"
+        return CMD._resolve_path(self.cmd) or "Not found"
 
     def is_available(self) -> bool:
         "Returns true if the command is available in the system"
-        return bool(which(self.cmd))
+        return bool(CMD._resolve_path(self.cmd))
+
+    def executable(self) -> str:
+        "Returns the absolute path of the binary if found, so that it is not searched again on each execution"
+        return CMD._resolve_path(self.cmd) or self.cmd
 
     def prepare(self, props: Optional[Dict] = None) -> List[str]:
         """Prepares the command and arguments to be executed
@@ -74,10 +304,16 @@ class CMD:
             props: Optional dictionary containing the parameters to format the command arguments.
 
         Returns:
-            The full command as returned by shlex.split
+            The full command as a list of arguments. Formatted paths are never split.
         """
-        args = self.args.format(**props) if props else self.args
-        return shlex.split(f"{self.cmd} {args}")
+        if not props:
+            return [self.executable(), *self.__argv]
+        # format_map reuses the props instead of copying them for every argument,
+        # and most arguments are flags without any placeholder to format
+        return [
+            self.executable(),
+            *(arg.format_map(props) if "{" in arg else arg for arg in self.__argv),
+        ]
 
 
 class TeX2img:
@@ -95,8 +331,24 @@ class TeX2img:
             latex     dvips    ps2pdf
     [4] TeX ----> DVI ----> SVG --?--> SVG
             latex     dvips     scour
-    [5] TeX ----> DVI -> JPG/PNG/TIFF
-            latex     gs
+    [5] TeX ----> DVI ----> PS -----> JPG/PNG/TIFF
+            latex     dvips     gs
+    [6] TeX ----> PDF -----> JPG/PNG/TIFF
+          pdflatex     gs
+    [7] TeX ----> PDF
+          pdflatex
+    [8] TeX ----> PDF -----> EPS
+          pdflatex   pdftops
+    [9] TeX ----> DVI ----> PNG
+            latex    dvipng
+    [10] TeX ----> DVI ----> PDF
+             latex    dvipdfmx
+
+    Flows [6], [7] and [8] are used instead of [5], [3] and [2] when `flow` is "pdflatex"
+    or latex is not available, as long as pdflatex (and pdftops for [8]) are available.
+    Otherwise, PNG files are produced with [9] when dvipng is available,
+    and PDF files with [10] when dvipdfmx is available.
+    In [6], PNG files are produced with mutool instead of gs when it is available.
 
     Attributes:
         template: TeX document template. Defaults to `DEFAULT_TEMPLATE`
@@ -104,33 +356,84 @@ class TeX2img:
         fontsize: Document fontsize. Defaults to `DEFAULT_FONTSIZE`
         commands: Dictionary of command to convert the TeX document to the different formats.
         params: Additional template variables.
-        logger: Logger that writes to stdout.
+        flow: Either "pdflatex" or "dvips". Defaults to "pdflatex"
+        precompile: If True, the preamble is precompiled into a format file with mylatexformat.
+        use_cache: If True, rendered files are stored in the cache and reused for identical documents.
+        cache_size: Maximum size in bytes of the rendered files in the cache. Defaults to `DEFAULT_CACHE_SIZE`
+        cache_dir: Directory where the precompiled formats and rendered files are stored. Defaults to `DEFAULT_CACHE_DIR`
+        backend: Either "gs" or "pypdfium2". With "pypdfium2", the PDF of pdflatex is rasterized
+            in-process with pypdfium2 and Pillow instead of with a command. Defaults to "gs"
+        daemon: If True, a latex process is kept waiting for the next document. See `start_daemon`.
+        tmpdir_root: Directory where the temporary files are written. Set with the `tmpdir` argument.
+            Defaults to the result of `_best_tmp`, which prefers /dev/shm on Linux
+        logger: Logger that writes to stdout, shared by all the converters.
         libgs: Only for Darwin-based systems.
     """
 
+    tmpdir_root: Optional[str] = None
+
+    # Commands that may write files to their working directory: the auxiliary files
+    # of TeX, and the missfont.log and the fonts made by mktexpk for the DVI readers
+    __TMPDIR_CMDS = frozenset(
+        ["dvi", "pdflatex", "fmt", "ps", "eps", "dvipng", "dvipdfmx", "svg"]
+    )
+
     def __init__(
         self,
         template: Optional[str] = None,
         preamble: Optional[str] = None,
         fontsize: Optional[int] = None,
         params: Optional[Dict] = None,
+        precompile: bool = True,
+        flow: str = "pdflatex",
+        use_cache: bool = True,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_dir: Optional[Union[str, Path]] = None,
+        backend: str = "gs",
+        tmpdir: Optional[str] = None,
     ):
         self.commands = {
-            # TODO: Allow also using pdflatex, xelatex or lualatex
+            # TODO: Allow also using xelatex or lualatex
             "dvi": CMD("latex", "-interaction nonstopmode -halt-on-error {tex_file}"),
-            "ps": CMD("dvips", "{dvi_file} -o {out_file}"),
-            "eps": CMD("dvips", "-E {dvi_file} -o {out_file}"),
+            "pdflatex": CMD(
+                "pdflatex", "-interaction nonstopmode -halt-on-error {tex_file}"
+            ),
+            "fmt": CMD(
+                "pdftex",
+                '-ini -interaction nonstopmode -halt-on-error -jobname={fmt_name} -output-directory={outdir} "&{engine}" mylatexformat.ltx {tex_file}',
+            ),
+            "ps": CMD("dvips", "-pp {page} {dvi_file} -o {out_file}"),
+            "eps": CMD("dvips", "-E -pp {page} {dvi_file} -o {out_file}"),
+            "pdftops": CMD("pdftops", "-eps -f {page} -l {page} {pdf_file} {out_file}"),
+            "dvipng": CMD(
+                "dvipng",
+                "-D 600 -T tight -bg Transparent -pp {page} -o {out_file} {dvi_file}",
+            ),
             "pdf": CMD("ps2pdf", "{ps_file} {out_file}"),
-            "svg": CMD("dvisvgm", "--exact-bbox --no-fonts {dvi_file} -o {out_file}"),
+            "dvipdfmx": CMD("dvipdfmx", "-q -s {page} -o {out_file} {dvi_file}"),
+            "pdf_page": CMD(
+                "gs",
+                "-q -sDEVICE=pdfwrite -dFirstPage={page} -dLastPage={page} -o {out_file} {pdf_file}",
+            ),
+            "svg": CMD(
+                "dvisvgm",
+                "--exact-bbox --no-fonts --page={page} {dvi_file} -o {out_file}",
+            ),
+            "mutool": CMD(
+                "mutool",
+                "draw -r 600 -c rgba -F png -o {out_file} {pdf_file} {page}",
+            ),
             "png": CMD(
-                "gs", "-dNOPAUSE -sDEVICE=pngalpha -r600 -o {out_file} {pdf_file}"
+                "gs",
+                "-q -sDEVICE=pngalpha -r600 -dFirstPage={page} -dLastPage={page} -o {out_file} {pdf_file}",
             ),
             "jpg": CMD(
                 "gs",
-                "-dNOPAUSE -sDEVICE=jpeg -dJPEGQ=95 -r600 -o {out_file} {pdf_file}",
+                "-q -sDEVICE=jpeg -dJPEGQ=95 -r600 -dFirstPage={page} -dLastPage={page} -o {out_file} {pdf_file}",
             ),
             "tiff": CMD(
-                "gs", "-dNOPAUSE -sDEVICE=tiffg4 -r600 -o {out_file} {pdf_file}"
+                "gs",
+                "-q -sDEVICE=tiffg4 -r600 -dFirstPage={page} -dLastPage={page} -o {out_file} {pdf_file}",
             ),
             "optimize": CMD(
                 "scour",
@@ -142,26 +445,164 @@ class TeX2img:
         self.preamble = preamble or DEFAULT_PREAMBLE
         self.fontsize = fontsize or DEFAULT_FONTSIZE
         self.params = params or {}
-
-        self.logger = logging.Logger("TeX2img", level=logging.ERROR)
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(logging.INFO)
-        formatter = logging.Formatter(
-            "%(asctime)s :: %(levelname)s :: %(message)s", datefmt="%H:%M:%S"
+        if flow not in VALID_FLOWS:
+            raise ValueError(f"Invalid flow {flow}")
+        self.flow = flow
+        if backend not in VALID_BACKENDS:
+            raise ValueError(f"Invalid backend {backend}")
+        self.backend = backend
+        if tmpdir is not None:
+            self.tmpdir_root = tmpdir
+        self.precompile = precompile
+        self.use_cache = use_cache
+        self.cache_size = cache_size
+        self.cache_dir = (
+            Path(cache_dir).expanduser() if cache_dir else DEFAULT_CACHE_DIR
         )
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
+        self.__formats: Dict[str, Optional[str]] = {}
+        self.__formats_lock = threading.Lock()
+        self.__envs: Dict[str, Dict[str, str]] = {}
+        self.__body_parts: Optional[Tuple[Tuple, Optional[Tuple[str, str]]]] = None
+
+        self.__jobs = itertools.count()
+        self.__daemon_dir: Optional[TemporaryDirectory] = None
+        self.__daemon_lock = threading.Lock()
+        self.__session_dir: Optional[str] = None
+        self.__standby: Optional[Tuple[subprocess.Popen, str, Tuple]] = None
+
+        self.logger = _logger
 
         self.__libgs: Optional[str] = None
-        if not hasattr(os.environ, "LIBGS") and not find_library("gs"):
-            if sys.platform == "darwin":
-                # Fallback to homebrew Ghostscript on macOS
-                homebrew_libgs = "/usr/local/opt/ghostscript/lib/libgs.dylib"
-                if Path(homebrew_libgs).exists():
-                    self.__libgs = homebrew_libgs
-            if not self.__libgs:
+        if "LIBGS" not in os.environ:
+            found, self.__libgs = _find_libgs()
+            if not found:
                 self.logger.info("libgs not found")
 
+    def __enter__(self):
+        self.start_daemon()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_daemon()
+
+    def __getstate__(self):
+        # The daemon cannot be shared with other processes
+        state = self.__dict__.copy()
+        state["_TeX2img__daemon_dir"] = None
+        state["_TeX2img__standby"] = None
+        state["_TeX2img__session_dir"] = None
+        # The environment is copied again from the one of the worker
+        state["_TeX2img__envs"] = {}
+        del state["_TeX2img__daemon_lock"]
+        del state["_TeX2img__formats_lock"]
+        # Job names only need to be unique within one process
+        del state["_TeX2img__jobs"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__daemon_lock = threading.Lock()
+        self.__formats_lock = threading.Lock()
+        self.__jobs = itertools.count()
+
+    @property
+    def daemon(self) -> bool:
+        return self.__daemon_dir is not None
+
+    def start_daemon(self, suffix: str = ".png"):
+        """Keeps a latex process waiting for the next document
+
+        Starting latex and loading the format happen before the next document is
+        available, so consecutive renders only pay for the typesetting itself.
+        The process is started with the arguments `-interaction nonstopmode -halt-on-error`
+        regardless of the arguments of the `dvi` or `pdflatex` commands.
+
+        The first process already loads the engine and the precompiled preamble of
+        `self.prepare("")` used for `suffix`. When a document needs another engine or
+        preamble, the waiting process is replaced.
+
+        The daemon is also started and stopped when using the converter as a context manager.
+
+        Args:
+            suffix: The suffix of the files that will be rendered. Defaults to ".png"
+        """
+        if self.__daemon_dir is None:
+            fmt_name = (
+                self.precompile_preamble(suffix=suffix) if self.precompile else None
+            )
+            self.__daemon_dir = TemporaryDirectory(
+                suffix="_tex2img", dir=self.tmpdir_root or _best_tmp()
+            )
+            self.__standby = self.__spawn_latex(self.__engine(suffix), fmt_name)
+
+    def stop_daemon(self):
+        "Stops the latex process started by `start_daemon`"
+        with self.__daemon_lock:
+            if self.__standby is not None:
+                self.__standby[0].kill()
+                self.__standby[0].wait()
+                self.__standby = None
+            if self.__daemon_dir is not None:
+                self.__daemon_dir.cleanup()
+                self.__daemon_dir = None
+
+    @contextlib.contextmanager
+    def session(self):
+        """Shares one temporary directory between the renders inside the context
+
+        `render` creates and removes a temporary directory for every document.
+        Inside a session, every render works in the same directory instead, with
+        a different name for its files, which are removed once the render finishes.
+
+        Example:
+            >>> with converter.session():
+            ...     for i, body in enumerate(bodies):
+            ...         converter.render(converter.prepare(body), f"eq_{i}.svg")
+
+        Yields:
+            The converter itself
+        """
+        if self.__session_dir is not None:
+            yield self
+            return
+
+        with TemporaryDirectory(
+            suffix="_tex2img", dir=self.tmpdir_root or _best_tmp()
+        ) as tmpdir:
+            self.__session_dir = tmpdir
+            try:
+                yield self
+            finally:
+                self.__session_dir = None
+
+    def clear_cache(self):
+        "Removes the precompiled formats and the rendered files from `self.cache_dir`"
+        with self.__formats_lock:
+            # The cache directory may be shared with other files, like ~/.cache
+            for name in ["fmt", "renders"]:
+                shutil.rmtree(self.cache_dir / name, ignore_errors=True)
+            # The formats are built again when needed
+            self.__formats.clear()
+
+    @staticmethod
+    def _hash_inputs(*inputs: str) -> str:
+        """Hash used as key of the precompiled formats and the rendered files
+
+        The inputs are fed one by one to a single BLAKE2b, separated by a null byte
+        so that moving text from one input to the next changes the hash.
+
+        Args:
+            inputs: The strings identifying the cached file
+
+        Returns:
+            The hexadecimal digest
+        """
+        key = hashlib.blake2b(digest_size=32)
+        for text in inputs:
+            key.update(text.encode("utf-8"))
+            key.update(b"\0")
+        return key.hexdigest()
+
     @staticmethod
     def is_valid_suffix(suffix: str) -> bool:
         """Check if the suffix is in VALID_SUFFIXES
@@ -170,7 +611,7 @@ class TeX2img:
         Returns:
             True if the extension is supported
         """
-        return suffix in VALID_SUFFIXES
+        return suffix.lower() in _VALID_SUFFIXES
 
     def check_deps(self) -> Dict[str, bool]:
         """Check installed dependencies.
@@ -190,7 +631,11 @@ class TeX2img:
     ) -> str:
         """Prepares the TeX document to be compiled
 
-        The arguments are updated first with self.params and then with kwargs
+        The arguments are updated first with self.params and then with kwargs.
+        Each template is split around its placeholders once, so it is filled by
+        joining the parts instead of running `Template.safe_substitute` on each call.
+        When only the body is given, the text around it is reused from the previous
+        call as long as the template, preamble, fontsize and params did not change.
 
         Args:
             body: The TeX element to compile.
@@ -202,7 +647,11 @@ class TeX2img:
         Returns:
             The prepared TeX document as a string
         """
-        tmpl = Template(template or self.template)
+        if not (template or preamble or fontsize or kwargs):
+            around_body = self.__around_body()
+            if around_body is not None:
+                return around_body[0] + body + around_body[1]
+
         params = {
             "preamble": preamble or self.preamble,
             "fontsize": fontsize or self.fontsize,
@@ -210,40 +659,383 @@ class TeX2img:
         }
         params.update(self.params)
         params.update(kwargs)
-        return tmpl.safe_substitute(**params)
 
-    def __run_cmd(self, cmd_name: str, props: Dict, tmpdir: str):
+        return TeX2img.__fill(_split_template(template or self.template), params)
+
+    @staticmethod
+    def __fill(parts: Tuple[Union[str, Tuple[str, str]], ...], params: Dict) -> str:
+        "Joins the parts of a template returned by `_split_template`, replacing the placeholders in params"
+        return "".join(
+            part
+            if isinstance(part, str)
+            else str(params[part[0]])
+            if part[0] in params
+            else part[1]
+            for part in parts
+        )
+
+    def __around_body(self) -> Optional[Tuple[str, str]]:
+        """Returns the text before and after the body with the default parameters
+
+        The text is filled once and kept until the template, preamble, fontsize or params change.
+
+        Returns:
+            The text before and after the body, or None if the template does not
+            contain the body placeholder exactly once or the params override it.
+        """
+        key = (self.template, self.preamble, self.fontsize, dict(self.params))
+        if self.__body_parts is None or self.__body_parts[0] != key:
+            around_body = None
+            parts = _split_template(self.template)
+            body_parts = [
+                i
+                for i, part in enumerate(parts)
+                if isinstance(part, tuple) and part[0] == "body"
+            ]
+            if len(body_parts) == 1 and "body" not in self.params:
+                params = {"preamble": self.preamble, "fontsize": self.fontsize}
+                params.update(self.params)
+                i = body_parts[0]
+                around_body = (
+                    TeX2img.__fill(parts[:i], params),
+                    TeX2img.__fill(parts[i + 1 :], params),
+                )
+            self.__body_parts = (key, around_body)
+        return self.__body_parts[1]
+
+    def __env(self) -> Optional[Dict[str, str]]:
+        """Environment for the system commands
+
+        On darwin systems, it loads LIBGS on the environment. TEXFORMATS is
+        extended with the `fmt` directory of `self.cache_dir` so that precompiled
+        formats are found.
+        The environment is only copied once for each cache directory.
+
+        Returns:
+            The environment or None if the commands inherit it unchanged
+        """
+        if not self.precompile and not self.__libgs:
+            return None
+        cache_dir = str(self.cache_dir)
+        if cache_dir not in self.__envs:
+            env = os.environ.copy()
+            if self.__libgs:
+                env["LIBGS"] = self.__libgs
+            # The trailing separator keeps the default search path
+            fmt_dir = os.path.join(cache_dir, "fmt")
+            env["TEXFORMATS"] = f"{fmt_dir}{os.pathsep}{env.get('TEXFORMATS', '')}"
+            self.__envs[cache_dir] = env
+        return self.__envs[cache_dir]
+
+    def __run_cmd(
+        self,
+        cmd_name: str,
+        props: Dict,
+        tmpdir: str,
+        log_errors: bool = True,
+        capture_stdout: bool = True,
+    ):
         """Wrapper to run a system command
 
-        On darwin systems, it loads LIBGS on the environment
+        The binary is executed by its absolute path and without closing the file
+        descriptors in the child (Python creates them non-inheritable anyway),
+        which lets CPython launch it with vfork/posix_spawn instead of a plain fork.
+        Only TeX and the commands that read the DVI run in `tmpdir`, as kpathsea may
+        write files to their working directory. The other commands receive absolute
+        paths, so they inherit the working directory and CPython can use posix_spawn,
+        which it skips when `cwd` is given.
+
+        The output of the command goes straight to an anonymous file in `tmpdir`
+        instead of a pipe, as latex alone can print hundreds of lines for a single
+        document. The file is only read if the command fails, to report the error.
+        Commands that report their errors on stderr, like dvips, can discard stdout.
 
         Args:
             cmd_name: The name of the command in self.commands
             props: The props to format the command with
-            tmpdir: The working directory for the command
+            tmpdir: The directory of the temporary files
+            log_errors: If False, the output of a failed command is not logged
+            capture_stdout: If False, stdout is discarded and only stderr is reported
 
         Raises:
             RuntimeError if the command failed
         """
-        env = os.environ.copy()
-        if self.__libgs:
-            env["LIBGS"] = self.__libgs
-
         cmd = self.commands[cmd_name].prepare(props)
-        try:
+        with TemporaryFile(dir=tmpdir) as output:
             ret = subprocess.run(
                 cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                cwd=tmpdir,
+                stdout=output if capture_stdout else subprocess.DEVNULL,
+                stderr=subprocess.STDOUT if capture_stdout else output,
+                cwd=tmpdir if cmd_name in self.__TMPDIR_CMDS else None,
+                env=self.__env(),
+                close_fds=False,
+            )
+            if ret.returncode == 0:
+                return
+
+            msg = f"Command '{cmd}' failed with exit code {ret.returncode}"
+            if log_errors:
+                output.seek(0)
+                self.logger.error(output.read().decode("utf-8", errors="replace"))
+                self.logger.error(msg)
+        raise RuntimeError(msg)
+
+    def __run_pipeline(self, stages: List[Tuple[str, Dict]], tmpdir: str):
+        """Runs several system commands connected through pipes
+
+        The stdout of each command is the stdin of the next one, so the intermediate
+        files are never written and the commands run concurrently.
+
+        Args:
+            stages: The name of each command in self.commands and the props to format it with.
+                The props should use "-" for the files read from stdin or written to stdout.
+            tmpdir: The directory of the temporary files
+
+        Raises:
+            RuntimeError if any of the commands failed
+        """
+        env = self.__env()
+        procs = []
+        stdin = None
+        for i, (cmd_name, props) in enumerate(stages):
+            # The output of the last command is only used to report errors
+            log = TemporaryFile(dir=tmpdir)
+            last = i == len(stages) - 1
+            proc = subprocess.Popen(
+                self.commands[cmd_name].prepare(props),
+                stdin=stdin,
+                stdout=log if last else subprocess.PIPE,
+                stderr=log,
+                cwd=tmpdir if cmd_name in self.__TMPDIR_CMDS else None,
                 env=env,
+                close_fds=False,
             )
-            ret.check_returncode()
-        except subprocess.CalledProcessError as e:
-            msg = f"Command '{cmd}' failed with exit code {e.returncode}"
-            self.logger.error(e.stdout.decode("utf-8"))
+            if stdin is not None:
+                # Only the child keeps the pipe open, so it gets SIGPIPE if the next one exits
+                stdin.close()
+            stdin = proc.stdout
+            procs.append((proc, log))
+
+        for proc, _ in reversed(procs):
+            proc.wait()
+
+        # Report the first command that failed, as the following ones fail because of it
+        for proc, log in procs:
+            with log:
+                if proc.returncode != 0:
+                    msg = (
+                        f"Command '{proc.args}' failed with exit code {proc.returncode}"
+                    )
+                    log.seek(0)
+                    self.logger.error(log.read().decode("utf-8", errors="replace"))
+                    self.logger.error(msg)
+                    raise RuntimeError(msg)
+
+    def __spawn_latex(
+        self, cmd_name: str, fmt_name: Optional[str]
+    ) -> Tuple[subprocess.Popen, str, Tuple]:
+        """Starts a latex process that waits for a document on stdin
+
+        Args:
+            cmd_name: The name of the TeX engine in self.commands, either "dvi" or "pdflatex"
+            fmt_name: The precompiled format to load. If None, the default format is used
+
+        Returns:
+            The process, its jobname and the engine and format it loaded
+        """
+        jobname = f"job_{next(self.__jobs)}"
+        argv = [
+            self.commands[cmd_name].executable(),
+            "-interaction",
+            "nonstopmode",
+            "-halt-on-error",
+            f"-jobname={jobname}",
+        ]
+        if fmt_name:
+            argv.append(f"&{fmt_name}")
+        proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=self.__daemon_dir.name,
+            env=self.__env(),
+            close_fds=False,
+        )
+        return proc, jobname, (cmd_name, fmt_name)
+
+    def __run_daemon(
+        self, cmd_name: str, props: Dict, fmt_name: Optional[str], tmpdir: str
+    ):
+        """Compiles the TeX file with the waiting latex process
+
+        A new process is started right away so that it is ready for the next document.
+        If latex fails, the document is compiled again with `__run_cmd` to report the error.
+
+        Args:
+            cmd_name: The name of the TeX engine in self.commands, either "dvi" or "pdflatex"
+            props: The props of the current render
+            fmt_name: The precompiled format the document expects
+            tmpdir: The working directory of the current render
+
+        Raises:
+            RuntimeError if latex failed
+        """
+        # Concurrent renders must not take the same process
+        with self.__daemon_lock:
+            if self.__standby is None:
+                # The daemon was stopped by another thread
+                self.__run_cmd(cmd_name, props, tmpdir)
+                return
+            daemon_dir = self.__daemon_dir.name
+            proc, jobname, loaded = self.__standby
+            if loaded != (cmd_name, fmt_name):
+                proc.kill()
+                proc.wait()
+                proc, jobname, _ = self.__spawn_latex(cmd_name, fmt_name)
+            self.__standby = self.__spawn_latex(cmd_name, fmt_name)
+
+        proc.communicate(f"\\input{{{props['tex_file']}}}\n".encode("utf-8"))
+        if proc.returncode != 0:
+            _remove_job_files(daemon_dir, jobname)
+            # The output of the retry is already in tmpdir
+            self.__run_cmd(cmd_name, props, tmpdir)
+            return
+
+        job_file = os.path.join(daemon_dir, jobname)
+        try:
+            if cmd_name == "pdflatex":
+                shutil.move(f"{job_file}.pdf", props["pdf_file"])
+            else:
+                shutil.move(f"{job_file}.dvi", props["dvi_file"])
+        except FileNotFoundError:
+            # stop_daemon removed the directory while latex was running
+            self.__run_cmd(cmd_name, props, tmpdir)
+            return
+        _remove_job_files(daemon_dir, jobname)
+
+    def __run_scour(self, props: Dict):
+        """Optimizes the svg with the Python API of scour
+
+        Importing scour once is much faster than starting a Python process for each file.
+        The arguments of the `optimize` command are parsed by scour itself.
+
+        Args:
+            props: The props to format the command with
+
+        Raises:
+            RuntimeError if scour failed
+        """
+        args = self.commands["optimize"].prepare(props)[1:]
+        try:
+            _scour(args)
+        except Exception as e:
+            msg = f"Command '{args}' failed in scour"
+            self.logger.error(e)
             self.logger.error(msg)
-            raise RuntimeError(msg)
+            raise RuntimeError(msg) from e
+
+    def __format_name(self, engine: str, tex: str, tmpdir: str) -> Optional[str]:
+        """Returns the name of the precompiled format for the preamble of `tex`
+
+        The preamble (everything before `\\begin{document}`) is dumped into a format
+        with mylatexformat the first time it is seen and stored in the `fmt`
+        directory of `self.cache_dir`.
+        Documents loading that format skip the preamble instead of parsing it again.
+
+        Args:
+            engine: The format the preamble is loaded on top of, either "latex" or "pdflatex"
+            tex: The full TeX document as a string.
+            tmpdir: The working directory used to build the format
+
+        Returns:
+            The name of the format or None if it could not be built
+        """
+        header, sep, _ = tex.partition(r"\begin{document}")
+        fmt_cmd = self.commands["fmt"]
+        if not sep or not fmt_cmd.is_available():
+            return None
+        if "mylatexformat" in fmt_cmd.args and not _has_mylatexformat():
+            return None
+
+        # The format is only valid for the binary that built it
+        key = TeX2img._hash_inputs(
+            engine, header, fmt_cmd.path(), str(os.stat(fmt_cmd.path()).st_mtime)
+        )
+        name = f"tex2img_{key}"
+        # Concurrent renders wait for the thread building the format instead of building it again
+        with self.__formats_lock:
+            if name not in self.__formats:
+                self.__formats[name] = self.__build_format(engine, name, tex, tmpdir)
+            return self.__formats[name]
+
+    def __build_format(
+        self, engine: str, name: str, tex: str, tmpdir: str
+    ) -> Optional[str]:
+        """Builds the format `name` unless it is already in the cache
+
+        Args:
+            engine: The format the preamble is loaded on top of, either "latex" or "pdflatex"
+            name: The name of the format
+            tex: The full TeX document as a string.
+            tmpdir: The working directory used to build the format
+
+        Returns:
+            The name of the format or None if it could not be built
+        """
+        fmt_dir = self.cache_dir / "fmt"
+        fmt_file = fmt_dir / f"{name}.fmt"
+        if fmt_file.exists():
+            return name
+
+        # The format is written straight into the cache with a temporary name
+        # and renamed, so that other processes never see a partial format
+        fmt_dir.mkdir(parents=True, exist_ok=True)
+        partial_name = f"{name}_{os.getpid()}_{threading.get_ident()}"
+        props = {
+            "engine": engine,
+            "fmt_name": partial_name,
+            "outdir": fmt_dir,
+            "tex_file": Path(tmpdir).resolve() / f"{name}.tex",
+        }
+        _write_tex(props["tex_file"], tex)
+        try:
+            self.__run_cmd("fmt", props, tmpdir, log_errors=False)
+        except RuntimeError:
+            self.logger.info(
+                "Could not precompile the preamble. Is mylatexformat installed?"
+            )
+            return None
+        finally:
+            (fmt_dir / f"{partial_name}.log").unlink(missing_ok=True)
+
+        os.replace(fmt_dir / f"{partial_name}.fmt", fmt_file)
+        self.logger.info("Precompiled preamble to %s", fmt_file)
+        return name
+
+    def precompile_preamble(
+        self, tex: Optional[str] = None, suffix: str = ".png"
+    ) -> Optional[str]:
+        """Builds the precompiled format ahead of the first render
+
+        Renders with the same preamble load the format from `self.cache_dir`
+        instead of building it. This is useful to pay for the preamble before
+        rendering, for example when starting an application.
+
+        Args:
+            tex: The full TeX document as a string. Defaults to `self.prepare("")`
+            suffix: The suffix of the output files, which decides if the format is built for latex or pdflatex.
+
+        Returns:
+            The name of the format or None if it could not be built
+        """
+        cmd_name = self.__engine(suffix)
+        with TemporaryDirectory(
+            suffix="_tex2img", dir=self.tmpdir_root or _best_tmp()
+        ) as tmpdir:
+            return self.__format_name(
+                self.commands[cmd_name].cmd, tex or self.prepare(""), tmpdir
+            )
 
     def render(
         self,
@@ -254,12 +1046,16 @@ class TeX2img:
     ):
         """Render the TeX string to the desired output file
 
-        If a dependency is not found, logs an error message and returns
+        If a dependency is not found, logs an error message and returns.
+        If `self.use_cache` is True and the same document was already rendered
+        with the same commands, the cached file is copied instead.
 
         The following template variables are available by default:
             - outdir: Absolute path to the directory of the user output file
             - filename: Name of the user output file without extension
             - out_file: Absolute path to the user output file
+            - page: Page of the compiled document to convert. Always 1 except for `render_batch`
+            - pages: Number of pages of the compiled document. Always 1 except for `render_batch`
             - tex_file: Absolute path to the temporary latex document
             - dvi_file: Absolute path to the temporary dvi file
             - ps_file:  Absolute path to the temporary ps file
@@ -276,117 +1072,788 @@ class TeX2img:
         Raises:
             RuntimeError: If the command executed with errors.
         """
-        with TemporaryDirectory(suffix="_tex2img") as tmpdir:
-            self.__render(tex, output_file, tmpdir, verbose, optimize_svg)
+        with _verbose(verbose):
+            cached_file = None
+            if self.use_cache:
+                cached_file = self.__cached_file(tex, output_file, optimize_svg)
+                try:
+                    shutil.copyfile(cached_file, output_file)
+                except FileNotFoundError:
+                    # Not cached, or evicted by another render since
+                    pass
+                else:
+                    # Mark the file as recently used
+                    with contextlib.suppress(FileNotFoundError):
+                        os.utime(cached_file)
+                    self.logger.info("Copied %s to %s", cached_file, output_file)
+                    return
 
-    def __render(
+            if self.__session_dir is not None:
+                stem = f"job_{next(self.__jobs)}"
+                try:
+                    rendered = self.__render(
+                        tex,
+                        output_file,
+                        self.__session_dir,
+                        verbose,
+                        optimize_svg,
+                        stem,
+                    )
+                finally:
+                    _remove_job_files(self.__session_dir, stem)
+            else:
+                with TemporaryDirectory(
+                    suffix="_tex2img", dir=self.tmpdir_root or _best_tmp()
+                ) as tmpdir:
+                    rendered = self.__render(
+                        tex, output_file, tmpdir, verbose, optimize_svg
+                    )
+
+            if rendered and cached_file:
+                try:
+                    self.__store(output_file, cached_file)
+                except OSError as e:
+                    # The file was rendered, the cache only saves the next render
+                    self.logger.info(
+                        "Could not store %s in the cache: %s", output_file, e
+                    )
+
+    def __cached_file(self, tex: str, output_file: str, optimize_svg: bool) -> str:
+        """Returns the path of the rendered file in the cache
+
+        The file is identified by the hash of the document, the output format and
+        the commands used to produce it.
+
+        Args:
+            tex: The full TeX document as a string.
+            output_file: The path to the output file.
+            optimize_svg: If True, the svg is optimized
+
+        Returns:
+            The path to the file inside the cache, which may not exist
+        """
+        suffix = os.path.splitext(output_file)[1].lower()
+        commands = (
+            f"{name}:{cmd.cmd} {cmd.args}" for name, cmd in self.commands.items()
+        )
+        key = TeX2img._hash_inputs(
+            tex, suffix, str(optimize_svg), self.flow, self.backend, *commands
+        )
+        # The files are spread in subdirectories so that no directory grows too large
+        return os.path.join(self.cache_dir, "renders", key[:2], f"{key}{suffix}")
+
+    def __store(self, output_file: str, cached_file: str):
+        """Copies a rendered file into the cache
+
+        When the cache grows over `self.cache_size`, the least recently used files
+        of all the subdirectories are removed. Other processes may evict the
+        same files at the same time, so the files that disappear are skipped.
+
+        Args:
+            output_file: The path to the rendered file.
+            cached_file: The path of the file inside the cache.
+        """
+        shard_dir = os.path.dirname(cached_file)
+        os.makedirs(shard_dir, exist_ok=True)
+        # Threads and processes storing the same document write different partial files
+        partial_id = f"{os.getpid()}_{threading.get_ident()}"
+        partial_file = f"{os.path.splitext(cached_file)[0]}.{partial_id}.tmp"
+        shutil.copyfile(output_file, partial_file)
+        os.replace(partial_file, cached_file)
+
+        entries = []
+        for entry in os.scandir(os.path.dirname(shard_dir)):
+            # Files stored before the subdirectories existed are also evicted
+            files = os.scandir(entry.path) if entry.is_dir() else [entry]
+            for file in files:
+                if not file.is_file() or file.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, file.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.cache_size:
+                break
+            total_size -= size
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+
+    def render_many(
+        self,
+        jobs: List[Tuple[str, str]],
+        max_workers: Optional[int] = None,
+        verbose: bool = False,
+        optimize_svg: bool = False,
+    ) -> List["Future"]:
+        """Render several TeX strings in parallel
+
+        Each job is rendered by `render` in a separate process with its own temporary
+        directory. Each distinct preamble is precompiled once before starting the workers,
+        so that they load the format instead of building the same one at the same time.
+
+        Args:
+            jobs: List of tuples with the full TeX document and the path to the output file.
+            max_workers: Number of processes. Defaults to the number of CPUs, but never more than the number of jobs.
+            verbose: If True, print the commands after being executed
+            optimize_svg: If True, optimize the final svg
+
+        Returns:
+            The futures of the renders in the same order as `jobs`. They are already done.
+        """
+        if self.precompile:
+            preambles: Dict[Tuple[str, str], Tuple[str, str]] = {}
+            for tex, output_file in jobs:
+                suffix = os.path.splitext(output_file)[1].lower()
+                header = tex.partition(r"\begin{document}")[0]
+                preambles.setdefault((self.__engine(suffix), header), (tex, suffix))
+            for tex, suffix in preambles.values():
+                self.precompile_preamble(tex, suffix)
+
+        # The converter is sent once to each worker instead of with every job.
+        # It is pickled even when the workers are forked, so that they never
+        # share the daemon or the session of this process
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            min(max_workers or os.cpu_count() or 1, max(len(jobs), 1)),
+            initializer=_init_worker,
+            initargs=(pickle.dumps(self),),
+        ) as executor:
+            return [
+                executor.submit(_render_one, tex, output_file, verbose, optimize_svg)
+                for tex, output_file in jobs
+            ]
+
+    async def render_async(
         self,
         tex: str,
         output_file: str,
-        tmpdir: str,
         verbose: bool = False,
         optimize_svg: bool = False,
+        executor: Optional["Executor"] = None,
     ):
-        if verbose:
-            self.logger.setLevel(logging.INFO)
+        """Asynchronous version of `render`
 
-        # Where the user wants the file
-        out_file = Path(output_file).resolve()
-        suffix = out_file.suffix
-        extension = suffix[1:]
+        The render runs in a thread of `executor`. The commands do not hold the GIL
+        while they run, so the stages of several documents overlap.
 
-        # User output filename without extension
-        filename = out_file.stem
-        # Absolute path to the temporary file without extension
-        base_file = Path(tmpdir).resolve() / filename
+        Args:
+            tex: The full TeX document as a string.
+            output_file: The path to the output file.
+            verbose: If True, print the commands after being executed
+            optimize_svg: If True, optimize the final svg
+            executor: The executor that runs the render. Defaults to the default executor of the event loop
 
-        if not TeX2img.is_valid_suffix(suffix):
-            raise ValueError(f"Invalid file extension {suffix}")
+        Raises:
+            RuntimeError: If the command executed with errors.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            executor,
+            functools.partial(self.render, tex, output_file, verbose, optimize_svg),
+        )
+
+    async def render_many_async(
+        self,
+        jobs: List[Tuple[str, str]],
+        max_workers: Optional[int] = None,
+        verbose: bool = False,
+        optimize_svg: bool = False,
+    ) -> List[Optional[BaseException]]:
+        """Render several TeX strings concurrently with `render_async`
+
+        The renders run in their own pool of threads, so the number of concurrent
+        renders is not limited by the default executor of the event loop.
+
+        Args:
+            jobs: List of tuples with the full TeX document and the path to the output file.
+            max_workers: Maximum number of concurrent renders. Defaults to the number of CPUs.
+            verbose: If True, print the commands after being executed
+            optimize_svg: If True, optimize the final svg
+
+        Returns:
+            The exception raised by each job, or None if it succeeded, in the same order as `jobs`.
+        """
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
 
-        if (
-            not self.commands[extension].is_available()
-            or not self.commands["dvi"].is_available()
-        ):
-            self.logger.error(
-                f"command {self.commands[extension].cmd} not found in the system. please install it first to continue"
+        executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1)
+        try:
+            return await asyncio.gather(
+                *(
+                    self.render_async(tex, output_file, verbose, optimize_svg, executor)
+                    for tex, output_file in jobs
+                ),
+                return_exceptions=True,
             )
+        finally:
+            # The event loop is not blocked waiting for renders that were cancelled
+            executor.shutdown(wait=False)
+
+    def render_batch(
+        self,
+        bodies: List[str],
+        output_files: List[str],
+        verbose: bool = False,
+        optimize_svg: bool = False,
+    ):
+        """Render several TeX elements with a single run of latex
+
+        Each body is placed in its own `tex2imgpage` environment, which is declared as
+        a page of the standalone class with its `multi` option. The document is compiled
+        once into one page per body and then each page is converted to its output file,
+        so starting latex and loading the preamble are only paid once. dvisvgm and mutool
+        convert all the pages with a single process, the other commands run once per page.
+
+        The template must use the standalone class, as `DEFAULT_TEMPLATE` does.
+        The rendered files are not stored in the cache.
+
+        Args:
+            bodies: The TeX elements to compile.
+            output_files: The path to the output file of each element. All of them must have the same suffix.
+            verbose: If True, print the commands after being executed
+            optimize_svg: If True, optimize the final svg
+
+        Raises:
+            ValueError: If the output files do not match the bodies or have different suffixes.
+            RuntimeError: If the command executed with errors.
+        """
+        if len(bodies) != len(output_files):
+            raise ValueError("Expected one output file for each body")
+        if not bodies:
             return
+        with _verbose(verbose):
+            suffixes = {
+                os.path.splitext(output_file)[1].lower() for output_file in output_files
+            }
+            if len(suffixes) != 1:
+                raise ValueError("All the output files must have the same suffix")
+            suffix = suffixes.pop()
+            if not TeX2img.is_valid_suffix(suffix):
+                raise ValueError(f"Invalid file extension {suffix}")
+
+            engine = self.__engine(suffix)
+            if not self.__check_cmds(engine, suffix, len(bodies)):
+                return
+
+            tex = self.prepare(
+                "\n".join(
+                    f"\\begin{{tex2imgpage}}\n{body}\n\\end{{tex2imgpage}}"
+                    for body in bodies
+                ),
+                preamble=f"{self.preamble}\n{self.__BATCH_PREAMBLE}",
+            )
+            # Page environments only start a new page in the multi mode of standalone
+            tex = f"\\PassOptionsToClass{{multi=tex2imgpage}}{{standalone}}\n{tex}"
+            with TemporaryDirectory(
+                suffix="_tex2img", dir=self.tmpdir_root or _best_tmp()
+            ) as tmpdir:
+                props = self.__props(output_files[0], tmpdir)
+                self.__compile(engine, tex, props, tmpdir)
+
+                batch_cmd = self.__batch_cmd(engine, suffix, optimize_svg)
+                if batch_cmd is not None:
+                    self.__convert_pages(batch_cmd, suffix, output_files, props, tmpdir)
+                    return
+
+                for page, output_file in enumerate(output_files, 1):
+                    page_props = self.__props(output_file, tmpdir)
+                    page_props.update(
+                        page=page,
+                        pages=len(bodies),
+                        tex_file=props["tex_file"],
+                        dvi_file=props["dvi_file"],
+                        pdf_file=props["pdf_file"],
+                    )
+                    self.__convert(engine, suffix, page_props, tmpdir, optimize_svg)
+
+    def __batch_cmd(
+        self, engine: str, suffix: str, optimize_svg: bool
+    ) -> Optional[str]:
+        """Returns the command that converts every page of a batch at once, if any
+
+        Args:
+            engine: The name of the command that compiles the TeX document
+            suffix: The suffix of the output files
+            optimize_svg: If True, the svg files are optimized
+
+        Returns:
+            The name of the command in self.commands or None to convert each page on its own
+        """
+        if suffix == ".svg" and not optimize_svg:
+            return "svg"
+        if suffix == ".png" and self.__raster_cmd(engine, suffix) == "mutool":
+            return "mutool"
+        return None
+
+    def __convert_pages(
+        self,
+        cmd_name: str,
+        suffix: str,
+        output_files: List[str],
+        props: Dict,
+        tmpdir: str,
+    ):
+        """Converts all the pages of the compiled document with a single command
+
+        The command receives the range of pages and a pattern for the names of the
+        files, which are then moved to their output files in order.
+
+        Args:
+            cmd_name: The name of the command in self.commands, a key of `__PAGE_PATTERNS`
+            suffix: The suffix of the output files
+            output_files: The path to the output file of each page
+            props: The props of the compiled document
+            tmpdir: The working directory of the render
+
+        Raises:
+            RuntimeError: If the command executed with errors or did not write every page.
+        """
+        pages = len(output_files)
+        pages_dir = os.path.join(os.path.realpath(tmpdir), "pages")
+        os.mkdir(pages_dir)
+        pattern = self.__PAGE_PATTERNS[cmd_name]
+        page_props = {
+            **props,
+            "page": f"1-{pages}",
+            "pages": pages,
+            "out_file": os.path.join(pages_dir, f"page-{pattern}{suffix}"),
+        }
+        self.__run_cmd(cmd_name, page_props, tmpdir, capture_stdout=False)
+
+        # dvisvgm may pad the page numbers with zeros, mutool does not
+        page_name = re.compile(rf"page-(\d+){re.escape(suffix)}")
+        page_files = {}
+        for entry in os.scandir(pages_dir):
+            match = page_name.fullmatch(entry.name)
+            if match:
+                page_files[int(match.group(1))] = entry.path
+        if sorted(page_files) != list(range(1, pages + 1)):
+            raise RuntimeError(f"Command '{cmd_name}' did not write the {pages} pages")
+
+        for page, output_file in enumerate(output_files, 1):
+            shutil.move(page_files[page], os.path.realpath(output_file))
+            self.logger.info("Converted page %d to %s", page, output_file)
+
+    def __engine(self, suffix: str) -> str:
+        """Returns the name of the command that compiles the TeX document
+
+        Args:
+            suffix: The suffix of the output file
+
+        Returns:
+            "pdflatex" if the output is produced from the PDF of pdflatex, "dvi" otherwise
+        """
+        if not self.commands["pdflatex"].is_available():
+            return "dvi"
+        if self.flow != "pdflatex" and self.commands["dvi"].is_available():
+            return "dvi"
+        if suffix in [".pdf", ".png", ".jpg", ".tiff"]:
+            return "pdflatex"
+        if suffix == ".eps" and self.commands["pdftops"].is_available():
+            return "pdflatex"
+        return "dvi"
+
+    def __raster_cmd(self, engine: str, suffix: str) -> str:
+        """Returns the name of the command that produces a raster output
+
+        PNG files are produced with dvipng or mutool when available, as they are
+        faster than Ghostscript. Otherwise, the command named after the extension is used.
+        With the "pypdfium2" backend, the PDF of pdflatex is rasterized in-process.
+
+        Args:
+            engine: The name of the command that compiles the TeX document
+            suffix: The suffix of the output file
+
+        Returns:
+            The name of the command in self.commands, or "pypdfium2"
+        """
+        if engine == "pdflatex" and self.backend == "pypdfium2":
+            return "pypdfium2"
+        if suffix == ".png":
+            if engine == "dvi" and self.commands["dvipng"].is_available():
+                return "dvipng"
+            if engine == "pdflatex" and self.commands["mutool"].is_available():
+                return "mutool"
+        return suffix[1:]
+
+    def __dvi_pdf_cmd(self) -> str:
+        """Returns the name of the command that converts the DVI to PDF
+
+        dvipdfmx is preferred when available, as it writes the PDF in one step
+        instead of going through dvips and ps2pdf.
+
+        Returns:
+            The name of the command in self.commands
+        """
+        if self.commands["dvipdfmx"].is_available():
+            return "dvipdfmx"
+        return "pdf"
+
+    def __check_cmds(self, engine: str, suffix: str, pages: int = 1) -> bool:
+        """Checks that the commands to produce a file are available
+
+        If a command is not found, logs an error message.
+
+        Args:
+            engine: The name of the command that compiles the TeX document
+            suffix: The suffix of the output file
+            pages: Number of pages of the compiled document, see `render_batch`
+
+        Returns:
+            True if all the commands are available
+        """
+        required = [engine]
+        if engine == "pdflatex" and suffix == ".eps":
+            required.append("pdftops")
+        elif suffix in [".png", ".jpg", ".tiff"]:
+            required.append(self.__raster_cmd(engine, suffix))
+        elif engine == "dvi" and suffix == ".pdf":
+            required.append(self.__dvi_pdf_cmd())
+        elif engine == "dvi" or suffix != ".pdf":
+            required.append(suffix[1:])
+        elif pages > 1:
+            # Each page is extracted from the PDF of pdflatex
+            required.append("pdf_page")
+        if required[-1] == "pypdfium2":
+            if not _has_module("pypdfium2") or not _has_module("PIL"):
+                self.logger.error(
+                    "pypdfium2 and Pillow are required by the pypdfium2 backend. please install them first to continue"
+                )
+                return False
+            required.pop()
+        for cmd_name in required:
+            if not self.commands[cmd_name].is_available():
+                self.logger.error(
+                    "command %s not found in the system. please install it first to continue",
+                    self.commands[cmd_name].cmd,
+                )
+                return False
+        return True
+
+    @staticmethod
+    def __props(output_file: str, tmpdir: str, stem: Optional[str] = None) -> Dict:
+        """Props available in the command templates. Every path is built only once
+
+        The paths are plain strings, as they are only formatted into the command arguments.
+
+        Args:
+            output_file: The path to the output file.
+            tmpdir: The working directory of the render
+            stem: Name of the temporary files. Defaults to the name of the output file
+
+        Returns:
+            The props of the render, see `render`
+        """
+        # Where the user wants the file
+        out_file = os.path.realpath(output_file)
+        outdir, basename = os.path.split(out_file)
+        # User output filename without extension
+        filename = os.path.splitext(basename)[0]
 
-        # Props available in the command templates
         props = {
-            "outdir": Path(out_file).parent.resolve(),
+            "outdir": outdir,
             "filename": filename,
-            "out_file": None,
-            "tex_file": base_file.with_suffix(".tex"),
-            "dvi_file": base_file.with_suffix(".dvi"),
+            "out_file": out_file,
+            "page": 1,
+            "pages": 1,
         }
-        for _suffix in VALID_SUFFIXES:
-            props[f"{_suffix[1:]}_file"] = base_file.with_suffix(_suffix)
+        # Absolute path to the temporary file without extension
+        base_file = os.path.join(os.path.realpath(tmpdir), stem or filename)
+        for key, _suffix in _FILE_PROPS:
+            props[key] = base_file + _suffix
+        return props
 
-        with open(props["tex_file"], "w+") as fp:
-            fp.write(tex)
-        self.logger.info(f"Wrote latex to {props['tex_file']}")
+    def __compile(self, engine: str, tex: str, props: Dict, tmpdir: str):
+        """Compiles the TeX document into the DVI or the PDF
 
-        self.__run_cmd("dvi", props, tmpdir)
-        self.logger.info(f"Converted latex to {props['dvi_file']}")
+        Args:
+            engine: The name of the command that compiles the TeX document
+            tex: The full TeX document as a string.
+            props: The props of the render
+            tmpdir: The working directory of the render
 
-        if suffix == ".ps":
-            props["out_file"] = out_file.with_suffix(".ps")
-            self.__run_cmd("ps", props, tmpdir)
-            self.logger.info(f"Converted dvi to {props['out_file']}")
-            return
+        Raises:
+            RuntimeError: If the command executed with errors.
+        """
+        fmt_name = None
+        if self.precompile:
+            fmt_name = self.__format_name(self.commands[engine].cmd, tex, tmpdir)
+        # The first line tells latex to load the precompiled preamble
+        _write_tex(props["tex_file"], tex, f"%&{fmt_name}\n" if fmt_name else "")
+        self.logger.info("Wrote latex to %s", props["tex_file"])
 
-        if suffix == ".eps":
-            props["out_file"] = out_file.with_suffix(".eps")
-            self.__run_cmd("eps", props, tmpdir)
-            self.logger.info(f"Converted dvi to {props['out_file']}")
-            return
+        if self.daemon:
+            self.__run_daemon(engine, props, fmt_name, tmpdir)
+        else:
+            self.__run_cmd(engine, props, tmpdir)
+
+        if engine == "pdflatex":
+            self.logger.info("Converted latex to %s", props["pdf_file"])
+        else:
+            self.logger.info("Converted latex to %s", props["dvi_file"])
+
+    def __render(
+        self,
+        tex: str,
+        output_file: str,
+        tmpdir: str,
+        verbose: bool = False,
+        optimize_svg: bool = False,
+        stem: Optional[str] = None,
+    ) -> bool:
+        # The suffix is lowercased once for the check and the dispatch
+        suffix = os.path.splitext(output_file)[1].lower()
+        if not TeX2img.is_valid_suffix(suffix):
+            raise ValueError(f"Invalid file extension {suffix}")
+
+        engine = self.__engine(suffix)
+        if not self.__check_cmds(engine, suffix):
+            return False
+
+        props = self.__props(output_file, tmpdir, stem)
+        self.__compile(engine, tex, props, tmpdir)
+        return self.__convert(engine, suffix, props, tmpdir, optimize_svg)
+
+    def __convert(
+        self,
+        engine: str,
+        suffix: str,
+        props: Dict,
+        tmpdir: str,
+        optimize_svg: bool = False,
+    ) -> bool:
+        """Converts the page `props["page"]` of the compiled document to the output file
 
-        if suffix == ".pdf":
-            props["out_file"] = base_file.with_suffix(".ps")
-            self.__run_cmd("ps", props, tmpdir)
-            self.logger.info(f"Converted dvi to {props['ps_file']}")
+        The stages of each output are looked up in `__CONVERTERS` by engine and suffix.
 
-            props["out_file"] = out_file.with_suffix(".pdf")
-            self.__run_cmd("pdf", props, tmpdir)
-            self.logger.info(f"Converted ps to {props['out_file']}")
+        Args:
+            engine: The name of the command that compiled the TeX document
+            suffix: The suffix of the output file
+            props: The props of the render
+            tmpdir: The working directory of the render
+            optimize_svg: If True, optimize the final svg
+
+        Returns:
+            True if the output file was produced
+
+        Raises:
+            RuntimeError: If the command executed with errors.
+        """
+        if suffix == ".svg" and optimize_svg:
+            return self.__dvi_to_optimized_svg(props, tmpdir)
+        self.__CONVERTERS[(engine, suffix)](self, props, tmpdir)
+        return True
+
+    def __pdf_to_pdf(self, props: Dict, tmpdir: str):
+        if props["pages"] == 1:
+            shutil.move(props["pdf_file"], props["out_file"])
+            self.logger.info("Moved pdf to %s", props["out_file"])
+        else:
+            self.__run_cmd("pdf_page", props, tmpdir)
+            self.logger.info("Converted pdf to %s", props["out_file"])
+
+    def __pdf_to_eps(self, props: Dict, tmpdir: str):
+        self.__run_cmd("pdftops", props, tmpdir, capture_stdout=False)
+        self.logger.info("Converted pdf to %s", props["out_file"])
+
+    def __pdf_to_raster(self, props: Dict, tmpdir: str):
+        suffix = os.path.splitext(props["out_file"])[1].lower()
+        cmd_name = self.__raster_cmd("pdflatex", suffix)
+        if cmd_name == "pypdfium2":
+            _pdfium_raster(props["pdf_file"], props["page"], props["out_file"], suffix)
+        else:
+            self.__run_cmd(cmd_name, props, tmpdir)
+        self.logger.info("Converted pdf to %s", props["out_file"])
+
+    def __dvi_to_ps(self, props: Dict, tmpdir: str):
+        self.__run_cmd("ps", props, tmpdir, capture_stdout=False)
+        self.logger.info("Converted dvi to %s", props["out_file"])
+
+    def __dvi_to_eps(self, props: Dict, tmpdir: str):
+        self.__run_cmd("eps", props, tmpdir, capture_stdout=False)
+        self.logger.info("Converted dvi to %s", props["out_file"])
+
+    def __dvi_to_pdf(self, props: Dict, tmpdir: str):
+        if self.__dvi_pdf_cmd() == "dvipdfmx":
+            self.__run_cmd("dvipdfmx", props, tmpdir, capture_stdout=False)
+            self.logger.info("Converted dvi to %s", props["out_file"])
             return
 
-        if suffix == ".svg":
-            if optimize_svg and not self.commands["optimize"].is_available():
-                self.logger.error("cannot optimize svg if scour is not found")
+        # The PS is streamed to ps2pdf, which reads it from stdin
+        self.__run_pipeline(
+            [
+                ("ps", {**props, "out_file": "-"}),
+                ("pdf", {**props, "ps_file": "-"}),
+            ],
+            tmpdir,
+        )
+        self.logger.info("Converted dvi to %s", props["out_file"])
 
-            elif optimize_svg and self.commands["optimize"].is_available():
-                props["prefix"] = "".join(random.sample(string.ascii_letters, 5)) + "_"
+    def __dvi_to_svg(self, props: Dict, tmpdir: str):
+        self.__run_cmd("svg", props, tmpdir, capture_stdout=False)
+        self.logger.info("Converted dvi to %s", props["out_file"])
 
-                props["out_file"] = base_file.with_suffix(".svg")
-                self.__run_cmd("svg", props, tmpdir)
-                self.logger.info(f"Converted dvi to {props['out_file']}")
+    def __dvi_to_optimized_svg(self, props: Dict, tmpdir: str) -> bool:
+        in_process = self.commands["optimize"].cmd == "scour" and _has_module("scour")
+        if not in_process and not self.commands["optimize"].is_available():
+            self.logger.error("cannot optimize svg if scour is not found")
+            return False
 
-                props["svg_file"] = props["out_file"]
-                props["out_file"] = out_file.with_suffix(".svg")
-                self.__run_cmd("optimize", props, tmpdir)
-                self.logger.info(
-                    f"Optimized svg {props['svg_file']} to {props['out_file']}"
-                )
-                return
-            else:
-                props["out_file"] = out_file.with_suffix(".svg")
-                self.__run_cmd("svg", props, tmpdir)
-                self.logger.info(f"Converted dvi to {props['out_file']}")
-                return
+        # Keeps the ids unique between svg files embedded in the same page.
+        # The ids cannot start with a digit
+        props["prefix"] = f"t{os.urandom(3).hex()}_"
 
-        if suffix in [".png", ".jpg", ".tiff"]:
-            props["out_file"] = base_file.with_suffix(".ps")
-            self.__run_cmd("ps", props, tmpdir)
-            self.logger.info(f"Converted dvi to {props['out_file']}")
+        self.__run_cmd(
+            "svg",
+            {**props, "out_file": props["svg_file"]},
+            tmpdir,
+            capture_stdout=False,
+        )
+        self.logger.info("Converted dvi to %s", props["svg_file"])
 
-            props["out_file"] = base_file.with_suffix(".pdf")
-            self.__run_cmd("pdf", props, tmpdir)
-            self.logger.info(f"Converted ps to {props['out_file']}")
+        if in_process:
+            self.__run_scour(props)
+        else:
+            self.__run_cmd("optimize", props, tmpdir)
+        self.logger.info("Optimized svg %s to %s", props["svg_file"], props["out_file"])
+        return True
 
-            props["pdf_file"] = base_file.with_suffix(".pdf")
-            props["out_file"] = out_file.with_suffix(suffix)
-            self.__run_cmd(extension, props, tmpdir)
-            self.logger.info(f"Converted pdf to {props['out_file']}")
+    def __dvi_to_raster(self, props: Dict, tmpdir: str):
+        extension = self.__raster_cmd(
+            "dvi", os.path.splitext(props["out_file"])[1].lower()
+        )
+        if extension == "dvipng":
+            self.__run_cmd("dvipng", props, tmpdir, capture_stdout=False)
+            self.logger.info("Converted dvi to %s", props["out_file"])
             return
+
+        # The PS is streamed to gs, which renders PostScript as well as PDF, so the
+        # PDF is never produced. dvips only writes the selected page, so gs renders the first one
+        self.__run_pipeline(
+            [
+                ("ps", {**props, "out_file": "-"}),
+                (extension, {**props, "pdf_file": "-", "page": 1}),
+            ],
+            tmpdir,
+        )
+        self.logger.info("Converted dvi to %s", props["out_file"])
+
+    # Stages that produce each output from the DVI of latex or the PDF of pdflatex
+    __CONVERTERS = {
+        ("pdflatex", ".pdf"): __pdf_to_pdf,
+        ("pdflatex", ".eps"): __pdf_to_eps,
+        ("pdflatex", ".png"): __pdf_to_raster,
+        ("pdflatex", ".jpg"): __pdf_to_raster,
+        ("pdflatex", ".tiff"): __pdf_to_raster,
+        ("dvi", ".ps"): __dvi_to_ps,
+        ("dvi", ".eps"): __dvi_to_eps,
+        ("dvi", ".pdf"): __dvi_to_pdf,
+        ("dvi", ".svg"): __dvi_to_svg,
+        ("dvi", ".png"): __dvi_to_raster,
+        ("dvi", ".jpg"): __dvi_to_raster,
+        ("dvi", ".tiff"): __dvi_to_raster,
+    }
+
+    # Placeholders for the page number in the output files of the commands used by `__convert_pages`
+    __PAGE_PATTERNS = {"svg": "%p", "mutool": "%d"}
+
+    # The environment of each page of a batch. standalone patches it into a page
+    __BATCH_PREAMBLE = r"""\makeatletter
+\@ifundefined{tex2imgpage}{\newenvironment{tex2imgpage}{}{}}{}
+\makeatother"""
+
+
+# scour keeps its state in module globals, so only one file is optimized at a time
+_scour_lock = threading.Lock()
+
+
+def _scour(args: List[str]):
+    """Optimizes an SVG file like the scour command, without printing the report
+
+    Args:
+        args: The arguments of the scour command, which must include the input and output files
+
+    Raises:
+        ValueError if the arguments are invalid
+    """
+    from scour.scour import parse_args, sanitizeOptions, scourString
+
+    try:
+        options = parse_args(args)
+    except SystemExit:
+        # optparse already printed the error to stderr
+        raise ValueError(f"Invalid arguments for scour: {args}") from None
+
+    with open(options.infilename, "rb") as svg:
+        in_string = svg.read()
+    with _scour_lock:
+        out_string = scourString(in_string, sanitizeOptions(options))
+    with open(options.outfilename, "wb") as svg:
+        svg.write(out_string.encode("utf-8"))
+
+
+# PDFium keeps global state, so the pages are never rendered from two threads at once
+_pdfium_lock = threading.Lock()
+
+
+def _pdfium_raster(pdf_file: str, page: int, out_file: str, suffix: str):
+    """Rasterizes a page of a PDF with pypdfium2 and saves it with Pillow
+
+    The page is rendered at 600 DPI like the gs commands, with a transparent background
+    for PNG files. TIFF files are saved as black and white with Group 4 compression.
+
+    Args:
+        pdf_file: The path to the PDF file.
+        page: The page to rasterize, starting from 1.
+        out_file: The path to the output file.
+        suffix: The suffix of the output file, either ".png", ".jpg" or ".tiff"
+
+    Raises:
+        RuntimeError if pypdfium2 could not load or render the PDF
+    """
+    import pypdfium2
+
+    alpha = 0 if suffix == ".png" else 255
+    with _pdfium_lock:
+        pdf = pypdfium2.PdfDocument(pdf_file)
+        try:
+            bitmap = pdf[page - 1].render(
+                scale=600 / 72, fill_color=(255, 255, 255, alpha)
+            )
+            image = bitmap.to_pil()
+        finally:
+            pdf.close()
+
+    if suffix == ".jpg":
+        image.convert("RGB").save(out_file, quality=95)
+    elif suffix == ".tiff":
+        image.convert("1").save(out_file, compression="group4")
+    else:
+        image.save(out_file)
+
+
+_worker_converter: Optional[TeX2img] = None
+
+
+def _init_worker(state: bytes):
+    "Stores the pickled converter of `TeX2img.render_many` in the worker process"
+    global _worker_converter
+    _worker_converter = pickle.loads(state)
+
+
+def _render_one(
+    tex: str,
+    output_file: str,
+    verbose: bool = False,
+    optimize_svg: bool = False,
+):
+    "Render a single job of `TeX2img.render_many` in a worker process"
+    _worker_converter.render(
+        tex, output_file, verbose=verbose, optimize_svg=optimize_svg
+    )